@@ -2,21 +2,29 @@ import sys
 import os
 import warnings
 import time
+from itertools import islice
 from typing import Dict, Any
 
-from PyQt5.QtCore import Qt, QTimer, QSize, QEvent
-from PyQt5.QtGui import QIcon, QFont, QColor, QSyntaxHighlighter, QTextCharFormat, QKeyEvent
+from PyQt5.QtCore import (Qt, QTimer, QSize, QEvent, QAbstractTableModel, QModelIndex, QObject, QThread,
+                          QSignalBlocker, pyqtSignal, pyqtSlot)
+from PyQt5.QtGui import QIcon, QFont, QColor, QSyntaxHighlighter, QTextCharFormat, QKeyEvent, QTextCursor
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QGridLayout,
                              QLineEdit, QSpinBox, QHBoxLayout, QVBoxLayout,
                              QLabel, QGroupBox, QPushButton, QListWidget, QSizePolicy, QAction, QFileDialog,
-                             QMessageBox, QDialog, QDockWidget, QPlainTextEdit, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QTabWidget, QSplitter, QInputDialog, QAbstractItemView)
+                             QMessageBox, QDialog, QDockWidget, QPlainTextEdit,
+                             QHeaderView, QTabWidget, QSplitter, QInputDialog, QAbstractItemView,
+                             QTableView, QStyledItemDelegate)
 
 from deolang.gridmap import GridMap
 from deolang.interpreter import Interpreter
 
 warnings.filterwarnings("ignore")
 
+HIGHLIGHT_BG = QColor("#228B22")
+HIGHLIGHT_FG = QColor("#FFFFFF")
+HIGHLIGHT_ROLES = [Qt.BackgroundRole, Qt.ForegroundRole]
+EDIT_ROLES = [Qt.DisplayRole, Qt.EditRole]
+
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -92,10 +100,169 @@ TIME
         self.setLayout(layout)
 
 
-class GridEditor(QTableWidget):
+class GridModel(QAbstractTableModel):
     def __init__(self, rows=20, cols=20, parent=None):
-        super().__init__(rows, cols, parent)
+        super().__init__(parent)
+        self._rows = rows
+        self._cols = cols
+        self._cells = [[" "] * cols for _ in range(rows)]
+        self._cursor = None
+        self._cached_text = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._cols
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            return self._cells[r][c]
+        if role == Qt.EditRole:
+            return self._cells[r][c].strip()
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if (r, c) == self._cursor:
+            if role == Qt.BackgroundRole:
+                return HIGHLIGHT_BG
+            if role == Qt.ForegroundRole:
+                return HIGHLIGHT_FG
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self._cells[index.row()][index.column()] = value[:1] if value else " "
+        self._cached_text = None
+        self.dataChanged.emit(index, index, EDIT_ROLES)
+        return True
+
+    def set_dimensions(self, rows, cols):
+        self.beginResetModel()
+        cells = self._cells
+        del cells[rows:]
+        for row in cells:
+            if len(row) > cols:
+                del row[cols:]
+            else:
+                row.extend([" "] * (cols - len(row)))
+        cells.extend([[" "] * cols for _ in range(rows - len(cells))])
+        self._rows, self._cols = rows, cols
+        if self._cursor and (self._cursor[0] >= rows or self._cursor[1] >= cols):
+            self._cursor = None
+        self._cached_text = None
+        self.endResetModel()
+
+    def load_lines(self, lines):
+        rows = max(self._rows, len(lines))
+        cols = max(self._cols, max(map(len, lines), default=0))
+
+        self.beginResetModel()
+        cells = [list(line.ljust(cols)) for line in lines]
+        cells.extend([[" "] * cols for _ in range(rows - len(cells))])
+        self._cells = cells
+        self._rows, self._cols = rows, cols
+        self._cursor = None
+        self._cached_text = None
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._cells = [[" "] * self._cols for _ in range(self._rows)]
+        self._cached_text = None
+        self.endResetModel()
+
+    def to_string(self):
+        if self._cached_text is None:
+            self._cached_text = "\n".join("".join(row) for row in self._cells)
+        return self._cached_text
+
+    def set_cursor(self, cell):
+        previous, self._cursor = self._cursor, cell
+        for pos in (previous, cell):
+            if pos is not None:
+                index = self.index(*pos)
+                self.dataChanged.emit(index, index, HIGHLIGHT_ROLES)
+
+
+class HeapModel(QAbstractTableModel):
+    HEADERS = ("Addr", "Val")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._heap = {}
+        self._keys = []
+        self._rows = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        key = self._keys[index.row()]
+        return str(key) if index.column() == 0 else str(self._heap[key])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def set_heap(self, heap):
+        old = self._heap
+        if heap == old:
+            return
+
+        # The interpreter never deletes heap entries, so within one run the
+        # shown keys are a prefix of the new ones; anything else (a reset,
+        # or a later run whose reset snapshot was skipped) is redrawn whole.
+        if list(islice(heap, len(self._keys))) != self._keys:
+            self.beginResetModel()
+            self._heap = heap
+            self._keys = list(heap)
+            self._rows = {key: row for row, key in enumerate(self._keys)}
+            self.endResetModel()
+            return
+
+        changed = [self._rows[key] for key, _ in heap.items() - old.items() if key in self._rows]
+        self._heap = heap
+        for row in changed:
+            index = self.index(row, 1)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+        if len(heap) > len(self._keys):
+            first = len(self._keys)
+            added = list(islice(heap, first, None))
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            self._keys.extend(added)
+            self._rows.update((key, first + i) for i, key in enumerate(added))
+            self.endInsertRows()
+
+
+class GridDelegate(QStyledItemDelegate):
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setMaxLength(1)
+        editor.setAlignment(Qt.AlignCenter)
+        return editor
+
+
+class GridEditor(QTableView):
+    def __init__(self, rows=20, cols=20, parent=None):
+        super().__init__(parent)
         self.last_highlight = None
+        self.grid_model = GridModel(rows, cols, self)
+        self.setModel(self.grid_model)
+        self.setItemDelegate(GridDelegate(self))
 
         self.setFont(QFont("Consolas", 12))
         self.setShowGrid(True)
@@ -110,117 +277,192 @@ class GridEditor(QTableWidget):
 
         self.setSelectionMode(QAbstractItemView.SingleSelection)
         self.setSelectionBehavior(QAbstractItemView.SelectItems)
-        self.fill_empty_items()
 
-    def fill_empty_items(self):
-        for r in range(self.rowCount()):
-            for c in range(self.columnCount()):
-                if self.item(r, c) is None:
-                    self.setItem(r, c, QTableWidgetItem(""))
-                    self.item(r, c).setTextAlignment(Qt.AlignCenter)
+    def rowCount(self):
+        return self.grid_model.rowCount()
 
-    def set_dimensions(self, rows, cols):
-        old_data = {}
-        for r in range(self.rowCount()):
-            for c in range(self.columnCount()):
-                item = self.item(r, c)
-                if item and item.text():
-                    old_data[(r, c)] = item.text()
+    def columnCount(self):
+        return self.grid_model.columnCount()
 
-        self.setRowCount(rows)
-        self.setColumnCount(cols)
-        self.fill_empty_items()
+    def set_current_cell(self, row, col):
+        self.setCurrentIndex(self.grid_model.index(row, col))
 
-        for (r, c), text in old_data.items():
-            if r < rows and c < cols:
-                self.item(r, c).setText(text)
+    def set_dimensions(self, rows, cols):
+        self.grid_model.set_dimensions(rows, cols)
+        if self.last_highlight and (self.last_highlight[0] >= rows or self.last_highlight[1] >= cols):
+            self.last_highlight = None
 
     def get_content_as_string(self):
-        lines = []
-        for r in range(self.rowCount()):
-            line_chars = []
-            for c in range(self.columnCount()):
-                item = self.item(r, c)
-                char = item.text() if item and item.text() else " "
-                line_chars.append(char)
-            lines.append("".join(line_chars))
-        return "\n".join(lines)
+        return self.grid_model.to_string()
 
     def load_content_from_string(self, content):
-        lines = content.splitlines()
-        req_rows = len(lines)
-        req_cols = max(len(l) for l in lines) if lines else 0
-
-        current_rows = max(self.rowCount(), req_rows)
-        current_cols = max(self.columnCount(), req_cols)
-
-        self.setRowCount(current_rows)
-        self.setColumnCount(current_cols)
-        self.fill_empty_items()
-        self.clear_grid_text()
-
-        for r, line in enumerate(lines):
-            for c, char in enumerate(line):
-                self.item(r, c).setText(char)
+        self.grid_model.load_lines(content.splitlines())
+        self.last_highlight = None
 
     def clear_grid_text(self):
-        for r in range(self.rowCount()):
-            for c in range(self.columnCount()):
-                if self.item(r, c):
-                    self.item(r, c).setText("")
+        self.grid_model.clear()
 
     def keyPressEvent(self, event: QKeyEvent):
-        row = self.currentRow()
-        col = self.currentColumn()
+        index = self.currentIndex()
+        row = index.row()
+        col = index.column()
 
         if event.text() and event.text().isprintable():
-            if self.currentItem():
-                self.currentItem().setText(event.text())
+            if index.isValid():
+                self.grid_model.setData(index, event.text())
 
             if col < self.columnCount() - 1:
-                self.setCurrentCell(row, col + 1)
+                self.set_current_cell(row, col + 1)
             elif row < self.rowCount() - 1:
                 pass
 
         elif event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
             if row < self.rowCount() - 1:
-                self.setCurrentCell(row + 1, 0)
+                self.set_current_cell(row + 1, 0)
 
         elif event.key() == Qt.Key_Backspace:
-            if self.currentItem():
-                self.currentItem().setText("")
+            if index.isValid():
+                self.grid_model.setData(index, "")
             if col > 0:
-                self.setCurrentCell(row, col - 1)
+                self.set_current_cell(row, col - 1)
             elif row > 0:
-                self.setCurrentCell(row - 1, self.columnCount() - 1)
+                self.set_current_cell(row - 1, self.columnCount() - 1)
 
         else:
             super().keyPressEvent(event)
 
     def highlight_cell(self, x, y):
-        if self.last_highlight:
-            lr, lc = self.last_highlight
-            if lr < self.rowCount() and lc < self.columnCount():
-                item = self.item(lr, lc)
-                if item:
-                    item.setBackground(QColor("#1e1e1e"))
-                    item.setForeground(QColor("#d4d4d4"))
-
         if 0 <= y < self.rowCount() and 0 <= x < self.columnCount():
-            item = self.item(y, x)
-            if item:
-                item.setBackground(QColor("#228B22"))
-                item.setForeground(QColor("#FFFFFF"))
-                self.last_highlight = (y, x)
-                self.scrollToItem(item)
+            self.last_highlight = (y, x)
+            self.grid_model.set_cursor(self.last_highlight)
+            self.scrollTo(self.grid_model.index(y, x))
+        else:
+            self.last_highlight = None
+            self.grid_model.set_cursor(None)
+
+
+class DebugInterpreter(Interpreter):
+    # W sleeps in short slices so that stopping the run (or closing the
+    # window) does not have to wait for it.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.interrupted = False
+
+    def op_wait(self):
+        if not self.stack: return
+        seconds = self.stack.pop()
+        if seconds < 0:
+            raise ValueError(seconds)
+        deadline = time.monotonic() + seconds
+        while not self.interrupted and (left := deadline - time.monotonic()) > 0:
+            time.sleep(min(left, 0.05))
+
+
+class InterpreterWorker(QObject):
+    state_changed = pyqtSignal(dict)
+    halted = pyqtSignal()
+    input_requested = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.interpreter = DebugInterpreter(build_in_input=self.read_input)
+        self.input_value = ""
+        self._running = False
+        self._batch = 1
+        # Batches are driven by a timer rather than a loop so that step,
+        # reset and new runs queued from the GUI run between them.
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._run_batch)
+
+    def read_input(self):
+        # Runs on the worker thread; the dialog itself is shown by the GUI
+        # thread, which stores the answer in input_value before returning.
+        self.input_requested.emit()
+        return self.input_value
+
+    def snapshot(self):
+        info = self.interpreter.get_information()
+        info['stack'] = list(info['stack'])
+        info['addition_stack'] = list(info['addition_stack'])
+        info['call_stack'] = list(info['call_stack'])
+        info['heap'] = dict(info['heap'])
+        return info
+
+    def stop(self):
+        # Called from the GUI thread; the timer notices on its next batch.
+        self._running = False
+        self.interpreter.interrupted = True
+
+    @pyqtSlot()
+    def shutdown(self):
+        # Runs on the worker thread as it finishes, where the timer lives.
+        self._running = False
+        self._timer.stop()
+
+    @pyqtSlot(str, int)
+    def run(self, code, hz):
+        self.interpreter.load_code(code)
+        self.interpreter.interrupted = False
+        self._batch = max(1, hz // 60)
+        self._running = True
+        self._timer.start(round(1000 * self._batch / hz))
+
+    @pyqtSlot()
+    def _run_batch(self):
+        if not self._running:
+            self._timer.stop()
+            return
+
+        alive = self.interpreter.run(self._batch)
+        self.state_changed.emit(self.snapshot())
+        if not alive:
+            self._running = False
+            self._timer.stop()
+            self.halted.emit()
+
+    @pyqtSlot(str)
+    def step(self, code):
+        if not self.interpreter.program:
+            self.interpreter.load_code(code)
+
+        self.interpreter.interrupted = False
+        alive = self.interpreter.run(1)
+        self.state_changed.emit(self.snapshot())
+        if not alive:
+            self.halted.emit()
+
+    @pyqtSlot()
+    def reset(self):
+        self.interpreter.reset()
+        self.state_changed.emit(self.snapshot())
 
 
 class MainWindow(QMainWindow):
+    run_requested = pyqtSignal(str, int)
+    step_requested = pyqtSignal(str)
+    reset_requested = pyqtSignal()
+
     def __init__(self):
         super().__init__()
-        self.interpreter = Interpreter(build_in_input=self.ask_input)
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.step)
+        self.worker = InterpreterWorker()
+        self.interpreter = self.worker.interpreter
+        self._latest_info = self.worker.snapshot()
+
+        self.worker_thread = QThread(self)
+        self.worker.moveToThread(self.worker_thread)
+        self.run_requested.connect(self.worker.run)
+        self.step_requested.connect(self.worker.step)
+        self.reset_requested.connect(self.worker.reset)
+        self.worker.state_changed.connect(self.on_state_changed)
+        self.worker.halted.connect(self.on_halted)
+        self.worker.input_requested.connect(self.ask_input, Qt.BlockingQueuedConnection)
+        self.worker_thread.finished.connect(self.worker.shutdown)
+        self.worker_thread.start()
+
+        self._view_pending = False
+        self._shown_stack = []
+        self._shown_aux = []
+        self._last_out_len = 0
         self.setup_ui()
 
     def setup_ui(self):
@@ -233,8 +475,8 @@ class MainWindow(QMainWindow):
             QDockWidget::title { background-color: #333333; padding: 5px; }
             QPlainTextEdit { background-color: #1e1e1e; color: #d4d4d4; font-family: Consolas, monospace; border: none; }
             QListWidget { background-color: #1e1e1e; color: #d4d4d4; border: 1px solid #333; }
-            QTableWidget { background-color: #1e1e1e; color: #d4d4d4; gridline-color: #333; border: none; font-family: Consolas; }
-            QTableWidget::item:selected { background-color: #094771; }
+            QTableView { background-color: #1e1e1e; color: #d4d4d4; gridline-color: #333; border: none; font-family: Consolas; }
+            QTableView::item:selected { background-color: #094771; }
             QHeaderView::section { background-color: #333; color: #ccc; border: 1px solid #2d2d2d; padding: 4px; }
             QPushButton { background-color: #0e639c; color: white; border: none; padding: 5px 10px; }
             QPushButton:hover { background-color: #1177bb; }
@@ -281,8 +523,9 @@ class MainWindow(QMainWindow):
 
         self.list_stack = QListWidget()
         self.list_aux = QListWidget()
-        self.table_heap = QTableWidget(0, 2)
-        self.table_heap.setHorizontalHeaderLabels(["Addr", "Val"])
+        self.heap_model = HeapModel(self)
+        self.table_heap = QTableView()
+        self.table_heap.setModel(self.heap_model)
         self.table_heap.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table_heap.verticalHeader().setVisible(False)
 
@@ -380,8 +623,12 @@ class MainWindow(QMainWindow):
                 with open(path, 'r') as f:
                     content = f.read()
                     self.grid_editor.load_content_from_string(content)
-                    self.spin_rows.setValue(self.grid_editor.rowCount())
-                    self.spin_cols.setValue(self.grid_editor.columnCount())
+                    # The editor already has the loaded size; letting each
+                    # spin box resize it would first cut the grid to the
+                    # old column count when the row count is applied.
+                    with QSignalBlocker(self.spin_rows), QSignalBlocker(self.spin_cols):
+                        self.spin_rows.setValue(self.grid_editor.rowCount())
+                        self.spin_cols.setValue(self.grid_editor.columnCount())
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
 
@@ -397,61 +644,101 @@ class MainWindow(QMainWindow):
 
     def ask_input(self):
         text, ok = QInputDialog.getText(self, "Input", "Enter value:")
-        if ok: return text
-        return ""
+        self.worker.input_value = text if ok else ""
+
+    def closeEvent(self, event):
+        self.worker.stop()
+        self.worker_thread.quit()
+        # Batches are short and stop() cuts a W short, so the worker is
+        # never left blocking for long.
+        self.worker_thread.wait()
+        super().closeEvent(event)
 
     def run(self):
+        self.stop()
         self.reset()
-        self.load_code()
-        self.timer.start(1000 // self.spin_speed.value())
+        self.run_requested.emit(self.grid_editor.get_content_as_string(), self.spin_speed.value())
 
     def stop(self):
-        self.timer.stop()
+        self.worker.stop()
 
     def step(self):
-        if not self.interpreter.program:
-            self.load_code()
-
-        if not self.interpreter.run(1):
-            self.stop()
-            self.txt_output.appendPlainText("\n--- Program Finished ---")
-
-        self.update_debug_view()
+        self.step_requested.emit(self.grid_editor.get_content_as_string())
 
     def reset(self):
-        self.interpreter.reset()
+        self.stop()
         self.txt_output.clear()
+        self._last_out_len = 0
 
         if self.grid_editor.last_highlight:
             self.grid_editor.highlight_cell(-1, -1)
 
-        self.update_debug_view()
+        self.reset_requested.emit()
 
-    def load_code(self):
-        code = self.grid_editor.get_content_as_string()
-        self.interpreter.load_code(code)
+    def on_state_changed(self, info):
+        self._latest_info = info
+        self.schedule_debug_view()
 
-    def update_debug_view(self):
-        info = self.interpreter.get_information()
+    def on_halted(self):
+        self.update_debug_view()
+        self.txt_output.appendPlainText("\n--- Program Finished ---")
+
+    def schedule_debug_view(self):
+        if not self._view_pending:
+            self._view_pending = True
+            QTimer.singleShot(16, self._flush_debug_view)
+
+    def _flush_debug_view(self):
+        if self._view_pending:
+            self.update_debug_view()
+
+    def _sync_stack_view(self, widget, shown, values):
+        if shown == values:
+            return shown
+
+        keep = 0
+        limit = min(len(shown), len(values))
+        while keep < limit and shown[keep] == values[keep]:
+            keep += 1
+
+        # Row 0 is the top of the stack, so only the size difference is
+        # inserted or taken there; the other changed rows keep their items
+        # and just get new text.
+        if not values:
+            widget.clear()
+        elif len(values) > len(shown):
+            widget.insertItems(0, [str(value) for value in reversed(values[len(shown):])])
+        else:
+            for _ in range(len(shown) - len(values)):
+                widget.takeItem(0)
 
-        self.list_stack.clear()
-        for item in reversed(info['stack']):
-            self.list_stack.addItem(str(item))
+        top = len(values) - 1
+        for i in range(keep, limit):
+            widget.item(top - i).setText(str(values[i]))
+        return list(values)
 
-        self.list_aux.clear()
-        for item in reversed(info['addition_stack']):
-            self.list_aux.addItem(str(item))
+    def update_debug_view(self):
+        self._view_pending = False
+        info = self._latest_info
 
-        self.table_heap.setRowCount(len(info['heap']))
-        for i, (k, v) in enumerate(info['heap'].items()):
-            self.table_heap.setItem(i, 0, QTableWidgetItem(str(k)))
-            self.table_heap.setItem(i, 1, QTableWidgetItem(str(v)))
+        self.dock_stack.setUpdatesEnabled(False)
+        try:
+            self._shown_stack = self._sync_stack_view(self.list_stack, self._shown_stack, info['stack'])
+            self._shown_aux = self._sync_stack_view(self.list_aux, self._shown_aux, info['addition_stack'])
+            self.heap_model.set_heap(info['heap'])
+        finally:
+            self.dock_stack.setUpdatesEnabled(True)
 
         out_text = info['output']
-        current_ui_text = self.txt_output.toPlainText().replace("\n--- Program Finished ---", "")
-
-        if out_text != current_ui_text:
-            self.txt_output.setPlainText(out_text)
+        if len(out_text) < self._last_out_len:
+            self.txt_output.clear()
+            self._last_out_len = 0
+
+        new_text = out_text[self._last_out_len:]
+        if new_text:
+            self.txt_output.moveCursor(QTextCursor.End)
+            self.txt_output.insertPlainText(new_text)
+            self._last_out_len = len(out_text)
 
         pos = info['position']
         self.grid_editor.highlight_cell(pos[0], pos[1])
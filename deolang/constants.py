@@ -1,3 +1,5 @@
+# Public tables describing the four directions by opcode and by turn; the
+# interpreter itself steps through DIRECTION_VECTORS below.
 DIRECTIONS = {
     "^": (0, -1),
     ">": (1, 0),
@@ -18,3 +20,8 @@ TURN_LEFT = {
     (-1, 0): (0, 1),
     (0, 1): (1, 0)
 }
+
+# The same four directions indexed clockwise from up, so turning right or
+# left is a step of one index.
+DIRECTION_VECTORS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+DIRECTION_INDEX = {vector: index for index, vector in enumerate(DIRECTION_VECTORS)}
@@ -1,71 +1,169 @@
+from __future__ import annotations
 import os
+from array import array
+
+# Cells hold code points; EMPTY marks padding that was never written.
+EMPTY = -1
+
+
+def _read_lines(file=None, content=None):
+    if content:
+        return content.splitlines()
+    if file and os.path.exists(file):
+        with open(file, 'r') as map_file:
+            return map_file.read().splitlines()
+    raise ValueError
+
 
 class GridMap:
     def __init__(self, file=None, content=None):
-        if content:
-            lines = content.splitlines()
-        elif file and os.path.exists(file):
-            with open(file, 'r') as map_file:
-                lines = map_file.readlines()
-        else:
-            raise ValueError
-        
-        raw_grid = [list(line.rstrip('\n')) for line in lines]
-        self.rows = len(raw_grid)
-        self.cols = max(len(row) for row in raw_grid) if raw_grid else 0
-        
-        self._map = [['' for _ in range(self.cols)] for _ in range(self.rows)]
-        for r, row in enumerate(raw_grid):
-            for c, char in enumerate(row):
-                self._map[r][c] = char
+        lines = _read_lines(file, content)
+
+        self.rows = len(lines)
+        self.cols = max(map(len, lines), default=0)
+        self._cap_rows = self.rows
+        self._cap_cols = self.cols
+        # Bumped on every write so callers can tell a cached decode is stale.
+        self.version = 0
+
+        self._map = array('i', [EMPTY]) * (self.rows * self.cols)
+        for r, line in enumerate(lines):
+            start = r * self.cols
+            self._map[start:start + len(line)] = array('i', map(ord, line))
 
     def get_map(self):
-        return [row[:] for row in self._map]
+        return GridView(self)
 
     def get_item(self, x: int, y: int) -> str:
-        if 0 <= y < len(self._map) and 0 <= x < len(self._map[y]):
-            return self._map[y][x]
+        if 0 <= y < self.rows and 0 <= x < self.cols:
+            v = self._map[y * self._cap_cols + x]
+            return chr(v) if v != EMPTY else ""
         return ""
 
+    def get_code(self, x: int, y: int) -> int:
+        if 0 <= y < self.rows and 0 <= x < self.cols:
+            return self._map[y * self._cap_cols + x]
+        return EMPTY
+
+    def read_run(self, x: int, y: int, n: int) -> list[int]:
+        # Code points of n cells from (x, y) rightwards; EMPTY off the grid.
+        codes = [EMPTY] * n
+        if 0 <= y < self.rows:
+            lo, hi = max(x, 0), min(x + n, self.cols)
+            if lo < hi:
+                row = y * self._cap_cols
+                codes[lo - x:hi - x] = self._map[row + lo:row + hi]
+        return codes
+
     def set_item(self, x: int, y: int, char: str):
         if x < 0 or y < 0:
             return
-        
+
+        self._ensure_size(x + 1, y + 1)
+        self._map[y * self._cap_cols + x] = ord(char) if char else EMPTY
+        self.version += 1
+
+    def set_code(self, x: int, y: int, code: int):
+        if not 0 <= code <= 0x10FFFF:
+            raise ValueError(code)
+        if x < 0 or y < 0:
+            return
+
         self._ensure_size(x + 1, y + 1)
-        self._map[y][x] = char
+        self._map[y * self._cap_cols + x] = code
+        self.version += 1
 
     def _ensure_size(self, w, h):
-        current_h = len(self._map)
-        current_w = len(self._map[0]) if current_h > 0 else 0
-        
-        if h > current_h:
-            for _ in range(h - current_h):
-                self._map.append([''] * current_w)
-        
-        if w > current_w:
-            for r in range(len(self._map)):
-                self._map[r].extend([''] * (w - len(self._map[r])))
-        
-        self.rows = len(self._map)
-        self.cols = len(self._map[0]) if self.rows > 0 else 0
+        if w > self._cap_cols or h > self._cap_rows:
+            self._grow(w, h)
+        self.rows = max(self.rows, h)
+        self.cols = max(self.cols, w)
+
+    def _grow(self, w, h):
+        # Capacity at least doubles, so a grid grown one cell at a time by
+        # `p` still copies each row only O(log n) times.
+        old, old_cols = self._map, self._cap_cols
+        if w > self._cap_cols:
+            self._cap_cols = max(w, self._cap_cols * 2)
+        if h > self._cap_rows:
+            self._cap_rows = max(h, self._cap_rows * 2)
+
+        stride = self._cap_cols
+        if stride == old_cols:
+            old.extend(array('i', [EMPTY]) * ((self._cap_rows * stride) - len(old)))
+            return
+
+        self._map = array('i', [EMPTY]) * (self._cap_rows * stride)
+        for r in range(self.rows):
+            self._map[r * stride:r * stride + old_cols] = old[r * old_cols:(r + 1) * old_cols]
 
     def merge_grid(self, other_grid_file: str, x_offset: int, y_offset: int):
+        if x_offset < 0 or y_offset < 0:
+            return False
         try:
-            other = GridMap(file=other_grid_file)
-            other_map = other.get_map()
-            h = len(other_map)
-            w = len(other_map[0]) if h > 0 else 0
+            lines = _read_lines(file=other_grid_file)
+            h = len(lines)
+            w = max(map(len, lines), default=0)
 
             self._ensure_size(x_offset + w, y_offset + h)
+            self.version += 1
 
-            for r in range(h):
-                for c in range(w):
-                    val = other_map[r][c]
-                    if val != '':
-                        self._map[r + y_offset][c + x_offset] = val
+            # Only the characters actually present on each line are copied;
+            # the padding that would make the other grid rectangular is
+            # never materialised, so nothing needs masking.
+            stride = self._cap_cols
+            for r, line in enumerate(lines):
+                start = (r + y_offset) * stride + x_offset
+                self._map[start:start + len(line)] = array('i', map(ord, line))
             return True
         except Exception:
             return False
 
     def __len__(self):
         return self.rows * self.cols
+
+
+# Live, read-only view[y][x] over a GridMap; cells are decoded only when read.
+# Use copy() for a detached list-of-lists snapshot.
+class GridView:
+
+    def __init__(self, grid: GridMap):
+        self._grid = grid
+
+    def __len__(self):
+        return self._grid.rows
+
+    def __getitem__(self, y):
+        rows = self._grid.rows
+        if isinstance(y, slice):
+            return [GridRowView(self._grid, i) for i in range(*y.indices(rows))]
+        if y < 0:
+            y += rows
+        if not 0 <= y < rows:
+            raise IndexError(y)
+        return GridRowView(self._grid, y)
+
+    def copy(self):
+        return [row.copy() for row in self]
+
+
+class GridRowView:
+    def __init__(self, grid: GridMap, y: int):
+        self._grid = grid
+        self._y = y
+
+    def __len__(self):
+        return self._grid.cols
+
+    def __getitem__(self, x):
+        cols = self._grid.cols
+        if isinstance(x, slice):
+            return [self._grid.get_item(i, self._y) for i in range(*x.indices(cols))]
+        if x < 0:
+            x += cols
+        if not 0 <= x < cols:
+            raise IndexError(x)
+        return self._grid.get_item(x, self._y)
+
+    def copy(self):
+        return list(self)
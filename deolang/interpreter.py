@@ -1,9 +1,75 @@
 from __future__ import annotations
 import random
 import time
+from functools import lru_cache
+from itertools import islice, repeat
+from operator import length_hint
 from typing import Any, Callable
-from deolang.gridmap import GridMap
-from deolang.constants import TURN_LEFT, TURN_RIGHT, DIRECTIONS
+from deolang.gridmap import GridMap, EMPTY
+from deolang.constants import DIRECTION_VECTORS, DIRECTION_INDEX
+
+UP, RIGHT, DOWN, LEFT = range(4)
+
+# Source for the opcodes that change nothing but the two stacks, `s` and
+# `a` (g only reads grid `m`); each matches its op_* method. A run of them
+# read left to right along a row is compiled into one function by
+# _compile_run.
+_PURE_SRC = {
+    "+": "if len(s) > 1: s.append(s.pop() + s.pop())",
+    "-": "if len(s) > 1: b = s.pop(); s[-1] -= b",
+    "*": "if len(s) > 1: s.append(s.pop() * s.pop())",
+    ":": "if len(s) > 1: b = s.pop(); a_ = s.pop(); s.append(0 if b == 0 else a_ // b)",
+    "%": "if len(s) > 1: b = s.pop(); a_ = s.pop(); s.append(0 if b == 0 else a_ % b)",
+    "&": "if len(s) > 1: s.append(s.pop() & s.pop())",
+    "o": "if len(s) > 1: s.append(s.pop() | s.pop())",
+    "x": "if len(s) > 1: s.append(s.pop() ^ s.pop())",
+    "~": "if s: s.append(~s.pop())",
+    "=": "if len(s) > 1: s.append(1 if s.pop() == s.pop() else 0)",
+    "(": "if len(s) > 1: b = s.pop(); s[-1] = 1 if s[-1] < b else 0",
+    ")": "if len(s) > 1: b = s.pop(); s[-1] = 1 if s[-1] > b else 0",
+    "P": "if s: s.pop()",
+    "S": "if len(s) > 1: s[-1], s[-2] = s[-2], s[-1]",
+    "C": "if s: s.append(s[-1])",
+    "D": "if s: a.append(s.pop())",
+    "U": "if a: s.append(a.pop())",
+    "{": "if len(s) > 1: s[:0] = [s.pop()]",
+    "}": "if len(s) > 1: s.append(s.pop(0))",
+    "L": "s.append(len(s))",
+    "Z": "s.clear()",
+    "g": "if len(s) > 1: y_ = s.pop(); v = m.get_code(s.pop(), y_); s.append(0 if v == EMPTY else v)",
+}
+_PURE_SRC.update((str(d), f"s.append({d})") for d in range(10))
+_PURE_CODES = [chr(code) in _PURE_SRC for code in range(128)]
+# Shorter runs cost more to set up than they save.
+_MIN_RUN = 3
+
+
+def _run_lines(text: str):
+    i = 0
+    while i < len(text):
+        # `x y g` with literal coordinates reads the cell directly, and
+        # consecutive ones walking along a row read it with one slice.
+        if text[i:i + 3].isdigit() or not (text[i:i + 2].isdigit() and text[i + 2:i + 3] == "g"):
+            yield _PURE_SRC[text[i]]
+            i += 1
+            continue
+        x, y = int(text[i]), int(text[i + 1])
+        n = 1
+        while text[i + 3 * n:i + 3 * n + 3] == f"{x + n}{y}g":
+            n += 1
+        if n == 1:
+            yield f"v = m.get_code({x}, {y}); s.append(0 if v == EMPTY else v)"
+        else:
+            yield f"s.extend([0 if v == EMPTY else v for v in m.read_run({x}, {y}, {n})])"
+        i += 3 * n
+
+
+@lru_cache(maxsize=256)
+def _compile_run(text: str) -> Callable:
+    src = "def run(s, a, m):\n" + "".join(f"    {line}\n" for line in _run_lines(text))
+    namespace = {"EMPTY": EMPTY}
+    exec(src, namespace)
+    return namespace["run"]
 
 class Interpreter:
     def __init__(self, program_input: str | None = None, build_in_input: Callable = None) -> None:
@@ -11,16 +77,23 @@ class Interpreter:
         self.stack = []
         self.addition_stack = []
         self.output = []
+        self._output_text = ""
+        self._output_len = 0
         self.call_stack = []
         self.heap = {}
         self.x = 0
         self.y = 0
-        self.direction = (1, 0)
+        self._dir = RIGHT
         self.ignore_mode = False
         self.string_mode = False
         self.input = program_input
         self.input_pointer = 0
         self.built_in_input = build_in_input
+        self._input_line = ""
+        self._input_line_pos = 0
+        self._runs = {}
+        self._skips = {}
+        self._runs_version = None
         self.ops = {
             "^": self.op_up,
             ">": self.op_right,
@@ -68,21 +141,170 @@ class Interpreter:
             "@": self.op_exit,
             "\"": self.op_quote
         }
+        # Jump table indexed by code point; every opcode is ASCII, anything
+        # at or above 128 goes through process_char.
+        self._dispatch = [None] * 128
+        for char, op in self.ops.items():
+            self._dispatch[ord(char)] = op
 
     def load_program(self, file: str) -> None:
         self.program = GridMap(file=file)
+        self._runs = {}
+        self._skips = {}
 
     def load_code(self, code: str) -> None:
         self.program = GridMap(content=code)
+        self._runs = {}
+        self._skips = {}
+
+    def _find_run(self, x: int, y: int) -> tuple[Callable | None, int]:
+        program = self.program
+        end = x
+        while end < program.cols and 32 < (code := program.get_code(end, y)) < 128 and _PURE_CODES[code]:
+            end += 1
+        if end - x < _MIN_RUN:
+            return None, 1
+        text = "".join(program.get_item(i, y) for i in range(x, end))
+        return _compile_run(text), end - x
+
+    def _find_skip(self, x: int, y: int, dx: int, dy: int) -> int:
+        # Cells ignore mode passes over before the |, _ or empty cell that
+        # ends it.
+        program = self.program
+        n = 0
+        while (code := program.get_code(x, y)) != EMPTY and code != 124 and code != 95:
+            n += 1
+            x += dx
+            y += dy
+        return n
 
     def run(self, steps: int = 0) -> bool:
         if steps < 0:
             raise ValueError
-        max_iterations = steps if steps > 0 else float('inf')
-        for _ in range(max_iterations):
-            char = self.program.get_item(self.x, self.y)
-            if self.process_char(char) is False:
-                return False
+        counter = repeat(None, steps) if steps > 0 else repeat(None)
+        program = self.program
+        dispatch = self._dispatch
+        stack = self.stack
+        aux = self.addition_stack
+        grid, stride = program._map, program._cap_cols
+        rows, cols = program.rows, program.cols
+        # Position stays in locals; self.x/self.y are written back before
+        # anything that can read or change them (ops, process_char, return).
+        # Only ops change the direction and the modes, so those are re-read
+        # after each op call.
+        x, y = self.x, self.y
+        vectors = DIRECTION_VECTORS
+        d = self._dir
+        dx, dy = vectors[d]
+        modal = self.string_mode or self.ignore_mode
+        # Fused runs of pure stack opcodes by grid offset, and ignore-mode
+        # spans by offset and direction; any grid write invalidates both.
+        runs, skips = self._runs, self._skips
+        if self._runs_version != program.version:
+            runs.clear()
+            skips.clear()
+            self._runs_version = program.version
+
+        for _ in counter:
+            code = grid[y * stride + x] if 0 <= x < cols and 0 <= y < rows else EMPTY
+
+            if modal:
+                if self.string_mode:
+                    if code == 34:  # "
+                        self.string_mode = modal = False
+                    elif code == EMPTY:
+                        # Keeps the TypeError process_char raises here.
+                        self.x, self.y = x, y
+                        return self.process_char("")
+                    else:
+                        stack.append(code)
+                elif code == 124 or code == 95 or code == EMPTY:
+                    # | and _ end ignore mode; so does an empty cell, since
+                    # process_char tests `"" in "|_"`.
+                    self.ignore_mode = modal = False
+                else:
+                    # Jump over the whole ignored span when the step budget
+                    # covers it, landing on the cell that ends it.
+                    key = (y * stride + x) * 4 + d
+                    n = skips.get(key)
+                    if n is None:
+                        n = skips[key] = self._find_skip(x, y, dx, dy)
+                    if n >= _MIN_RUN and (not steps or length_hint(counter) >= n - 1):
+                        if steps:
+                            next(islice(counter, n - 2, None))
+                        x += dx * n
+                        y += dy * n
+                        continue
+                x += dx
+                y += dy
+                continue
+
+            # A fused run only stands in for its cells when the step budget
+            # covers all of them, so run(n) still stops on the same cell.
+            if dx == 1 and 32 < code < 128 and _PURE_CODES[code]:
+                pos = y * stride + x
+                found = runs.get(pos)
+                if found is None:
+                    found = runs[pos] = self._find_run(x, y)
+                fn, n = found
+                if fn is not None and (not steps or length_hint(counter) >= n - 1):
+                    fn(stack, aux, program)
+                    if steps:
+                        next(islice(counter, n - 2, None))
+                    x += n
+                    continue
+
+            # Blank and off-grid cells are the commonest of all and skip the
+            # rest of the decode. The commonest pure stack opcodes are handled
+            # inline so they cost no method call; they match op_add, op_sub,
+            # op_mul and op_copy.
+            if code == 32 or code == EMPTY:
+                pass
+            elif 48 <= code <= 57:
+                stack.append(code - 48)
+            elif code == 43:  # +
+                if len(stack) > 1:
+                    stack.append(stack.pop() + stack.pop())
+            elif code == 45:  # -
+                if len(stack) > 1:
+                    b = stack.pop()
+                    stack[-1] -= b
+            elif code == 42:  # *
+                if len(stack) > 1:
+                    stack.append(stack.pop() * stack.pop())
+            elif code == 67:  # C
+                if stack:
+                    stack.append(stack[-1])
+            elif code >= 128:
+                self.x, self.y = x, y
+                if self.process_char(program.get_item(x, y)) is False:
+                    return False
+                x, y = self.x, self.y
+                continue
+            elif (op := dispatch[code]) is not None:
+                self.x, self.y = x, y
+                try:
+                    res = op()
+                except Exception:
+                    return False
+                if res is False:
+                    return False
+                x, y = self.x, self.y
+                d = self._dir
+                dx, dy = vectors[d]
+                modal = self.string_mode or self.ignore_mode
+                # `p` and `M` may have grown or rewritten the grid.
+                if program.version != self._runs_version:
+                    runs.clear()
+                    skips.clear()
+                    self._runs_version = program.version
+                    grid, stride = program._map, program._cap_cols
+                    rows, cols = program.rows, program.cols
+                if res == "JUMPED":
+                    continue
+            x += dx
+            y += dy
+        self.x, self.y = x, y
         return 0 < steps
 
     def get_current_char(self) -> str:
@@ -91,7 +313,12 @@ class Interpreter:
         return ""
 
     def get_output(self) -> str:
-        return "".join(self.output)
+        # Output only ever grows between resets, so the joined text is
+        # rebuilt only when something was printed since the last call.
+        if len(self.output) != self._output_len:
+            self._output_text = "".join(self.output)
+            self._output_len = len(self.output)
+        return self._output_text
 
     def get_program(self) -> GridMap | None:
         if self.program:
@@ -118,27 +345,48 @@ class Interpreter:
         self.stack = []
         self.addition_stack = []
         self.output = []
+        self._output_text = ""
+        self._output_len = 0
         self.call_stack = []
         self.heap = {}
         self.ignore_mode = False
         self.string_mode = False
         self.input_pointer = 0
+        self._input_line = ""
+        self._input_line_pos = 0
         self.x = 0
         self.y = 0
-        self.direction = (1, 0)
+        self._dir = RIGHT
+
+    @property
+    def direction(self) -> tuple[int, int]:
+        return DIRECTION_VECTORS[self._dir]
+
+    @direction.setter
+    def direction(self, vector: tuple[int, int]) -> None:
+        self._dir = DIRECTION_INDEX[vector]
 
     def set_input(self, input_data: str = "", pointer_position: int = 0) -> None:
         self.input = input_data
         self.input_pointer = pointer_position
+        self._input_line = ""
+        self._input_line_pos = 0
         self.built_in_input = False if self.input else True
 
     def _pop_string(self) -> str:
+        # Reads down to the 0 terminator in place and drops everything read
+        # with one del, including the value chr() rejected if it raises.
+        stack = self.stack
         chars = []
-        while self.stack:
-            val = self.stack.pop()
-            if val == 0:
-                break
-            chars.append(chr(val))
+        n = 0
+        try:
+            for val in reversed(stack):
+                n += 1
+                if val == 0:
+                    break
+                chars.append(chr(val))
+        finally:
+            del stack[len(stack) - n:]
         return "".join(chars)
 
     def process_char(self, char: str) -> bool:
@@ -175,14 +423,15 @@ class Interpreter:
         return True
 
     def move(self):
-        self.x += self.direction[0]
-        self.y += self.direction[1]
+        dx, dy = DIRECTION_VECTORS[self._dir]
+        self.x += dx
+        self.y += dy
 
-    def op_up(self): self.direction = DIRECTIONS["^"]
-    def op_right(self): self.direction = DIRECTIONS[">"]
-    def op_left(self): self.direction = DIRECTIONS["<"]
-    def op_down(self): self.direction = DIRECTIONS["V"]
-    def op_random_dir(self): self.direction = random.choice(list(DIRECTIONS.values()))
+    def op_up(self): self._dir = UP
+    def op_right(self): self._dir = RIGHT
+    def op_left(self): self._dir = LEFT
+    def op_down(self): self._dir = DOWN
+    def op_random_dir(self): self._dir = random.getrandbits(2)
 
     def op_add(self):
         if len(self.stack) < 2: return
@@ -255,7 +504,9 @@ class Interpreter:
         if self.addition_stack: self.stack.append(self.addition_stack.pop())
 
     def op_rotate_left(self):
-        if len(self.stack) > 1: self.stack.insert(0, self.stack.pop())
+        # Slice assignment shifts the list with one memmove; insert(0, ...)
+        # moves the items one at a time.
+        if len(self.stack) > 1: self.stack[:0] = [self.stack.pop()]
 
     def op_rotate_right(self):
         if len(self.stack) > 1: self.stack.append(self.stack.pop(0))
@@ -275,9 +526,19 @@ class Interpreter:
     def op_input(self):
         if not self.input:
             if self.built_in_input:
-                val = self.built_in_input()
-                if isinstance(val, str) and val: self.stack.append(ord(val[0]))
-                elif isinstance(val, int): self.stack.append(val)
+                # A line read from built_in_input is handed out one character
+                # per I; the next line is only asked for once it runs out.
+                if self._input_line_pos >= len(self._input_line):
+                    val = self.built_in_input()
+                    if isinstance(val, int):
+                        self.stack.append(val)
+                        return
+                    if not isinstance(val, str) or not val:
+                        self.stack.append(-1)
+                        return
+                    self._input_line, self._input_line_pos = val, 0
+                self.stack.append(ord(self._input_line[self._input_line_pos]))
+                self._input_line_pos += 1
         else:
             if self.input_pointer < len(self.input):
                 self.stack.append(ord(self.input[self.input_pointer]))
@@ -297,13 +558,13 @@ class Interpreter:
     def op_grid_get(self):
         if len(self.stack) < 2: return
         y, x = self.stack.pop(), self.stack.pop()
-        val = self.program.get_item(x, y)
-        self.stack.append(ord(val) if val else 0)
+        val = self.program.get_code(x, y)
+        self.stack.append(val if val != EMPTY else 0)
 
     def op_grid_put(self):
         if len(self.stack) < 3: return
         y, x, val = self.stack.pop(), self.stack.pop(), self.stack.pop()
-        self.program.set_item(x, y, chr(val))
+        self.program.set_code(x, y, val)
 
     def op_jump(self):
         if len(self.stack) < 2: return
@@ -313,7 +574,8 @@ class Interpreter:
     def op_func_call(self):
         if len(self.stack) < 2: return
         y, x = self.stack.pop(), self.stack.pop()
-        self.call_stack.append((self.x + self.direction[0], self.y + self.direction[1]))
+        dx, dy = DIRECTION_VECTORS[self._dir]
+        self.call_stack.append((self.x + dx, self.y + dy))
         self.x, self.y = x, y
         return "JUMPED"
 
@@ -335,19 +597,19 @@ class Interpreter:
         if self.stack: time.sleep(self.stack.pop())
 
     def op_vertical_mirror(self):
-        if self.direction in ((-1, 0), (1, 0)): self.ignore_mode = True
+        if self._dir in (LEFT, RIGHT): self.ignore_mode = True
 
     def op_horizontal_mirror(self):
-        if self.direction in ((0, -1), (0, 1)): self.ignore_mode = True
+        if self._dir in (UP, DOWN): self.ignore_mode = True
 
     def op_mirror_slash(self):
         if not self.stack: return
-        self.direction = TURN_LEFT[self.direction] if self.stack.pop() == 0 else TURN_RIGHT[self.direction]
+        self._dir = (self._dir - 1) % 4 if self.stack.pop() == 0 else (self._dir + 1) % 4
 
     def op_mirror_backslash(self):
         if not self.stack: return
         val = self.stack.pop()
-        self.direction = TURN_RIGHT[self.direction] if val == 0 else TURN_LEFT[self.direction]
+        self._dir = (self._dir + 1) % 4 if val == 0 else (self._dir - 1) % 4
 
     def op_exit(self): return False
 
@@ -0,0 +1,51 @@
+import sys
+from deolang.interpreter import Interpreter
+
+# Steps run between flushes, so output without a newline still shows up
+# while a long program keeps going.
+_FLUSH_STEPS = 10000
+
+
+# Interpreter for compiled programs: N and A write straight to stdout
+# instead of collecting output for get_output().
+class ConsoleInterpreter(Interpreter):
+    def op_print_num(self):
+        if self.stack:
+            sys.stdout.write(str(self.stack.pop()))
+
+    def op_print_char(self):
+        if self.stack:
+            c = chr(self.stack.pop())
+            sys.stdout.write(c)
+            # stdout buffers the rest; a completed line is shown at once.
+            if c == "\n":
+                sys.stdout.flush()
+
+    def op_wait(self):
+        sys.stdout.flush()
+        super().op_wait()
+
+    def op_exit(self):
+        sys.stdout.flush()
+        return False
+
+
+def cli_input():
+    try:
+        s = input()
+        return s
+    except (EOFError, KeyboardInterrupt):
+        return ""
+
+
+def main(program_code: str) -> None:
+    interpreter = ConsoleInterpreter(build_in_input=cli_input)
+    interpreter.load_code(program_code)
+
+    try:
+        while interpreter.run(_FLUSH_STEPS):
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout.flush()